@@ -0,0 +1,222 @@
+"""
+Streaming bulk export and import of agent notes.
+
+Exports walk every `refs/notes/agent/*` namespace and stream one record per
+note ({"namespace", "commit", "note"}) into gzip-compressed JSONL or a Parquet
+file. Imports stream records back through a single `git fast-import` process,
+creating one notes commit per namespace.
+"""
+import gzip
+import json
+import re
+import subprocess
+from typing import Callable, Iterable, Iterator, Optional
+
+from git import GitCommandError
+
+from .main import get_note_ref
+
+NOTES_PREFIX = "refs/notes/agent/"
+BATCH_SIZE = 10_000
+FORMATS = ("jsonl", "parquet")
+COMMIT_RE = re.compile(r"^[0-9a-f]{40}$")
+# Whitespace and control characters would let a namespace smuggle extra fast-import commands.
+UNSAFE_NAMESPACE_RE = re.compile(r"[\s\x00-\x1f\x7f]")
+
+
+def detect_format(path: str) -> str:
+    return "parquet" if path.endswith(".parquet") else "jsonl"
+
+
+def list_namespaces(repo) -> list[str]:
+    refs = repo.git.execute(["git", "for-each-ref", "--format=%(refname)", NOTES_PREFIX])
+    return [ref[len(NOTES_PREFIX):] for ref in refs.splitlines() if ref]
+
+
+def iter_notes(repo, namespaces: Optional[list[str]] = None) -> Iterator[dict]:
+    """Yield every note, one namespace at a time, without loading a namespace into memory."""
+    for namespace in namespaces or list_namespaces(repo):
+        listing = repo.git.execute(["git", "notes", "--ref", get_note_ref(namespace), "list"], as_process=True)
+        try:
+            for line in listing.proc.stdout:
+                blob, commit = line.decode().split()
+                # Served by one persistent `git cat-file --batch` process.
+                _, _, _, data = repo.git.get_object_data(blob)
+                # Notes are usually UTF-8 JSON, but git accepts any bytes; keep them lossless.
+                yield {"namespace": namespace, "commit": commit, "note": data.decode("utf-8", "surrogateescape")}
+        except BaseException:
+            # The consumer stopped early; do not block on a `git notes list` with undrained output.
+            listing.proc.kill()
+            listing.proc.wait()
+            raise
+        listing.wait()
+
+
+def _batched(records: Iterable[dict], size: int = BATCH_SIZE) -> Iterator[list[dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_jsonl(records: Iterable[dict], path: str) -> int:
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    with open(path, "rb") as raw:
+        gzipped = raw.read(2) == b"\x1f\x8b"
+    opener = gzip.open if gzipped else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet support requires pyarrow (pip install 'agent-notes[parquet]')")
+    return pyarrow
+
+
+def write_parquet(records: Iterable[dict], path: str) -> int:
+    pa = _import_pyarrow()
+    # Notes are stored as raw bytes so non-UTF-8 notes survive the round trip.
+    schema = pa.schema([("namespace", pa.string()), ("commit", pa.string()), ("note", pa.binary())])
+    count = 0
+    with pa.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in _batched(records):
+            rows = [{**r, "note": r["note"].encode("utf-8", "surrogateescape")} for r in batch]
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(batch)
+    return count
+
+
+def read_parquet(path: str) -> Iterator[dict]:
+    pa = _import_pyarrow()
+    for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=BATCH_SIZE):
+        for record in batch.to_pylist():
+            if isinstance(record.get("note"), bytes):
+                record["note"] = record["note"].decode("utf-8", "surrogateescape")
+            yield record
+
+
+def _data(text: str) -> bytes:
+    payload = text.encode("utf-8", "surrogateescape")
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def is_valid_namespace(repo, namespace, checked: dict) -> bool:
+    """Check that `namespace` is a safe, well-formed ref component under refs/notes/agent/."""
+    if not isinstance(namespace, str) or not namespace or UNSAFE_NAMESPACE_RE.search(namespace):
+        return False
+    if namespace not in checked:
+        try:
+            repo.git.execute(["git", "check-ref-format", get_note_ref(namespace)])
+            checked[namespace] = True
+        except GitCommandError:
+            checked[namespace] = False
+    return checked[namespace]
+
+
+def is_valid_record(repo, record, checked: dict) -> bool:
+    return (
+        isinstance(record, dict)
+        and isinstance(record.get("commit"), str)
+        and COMMIT_RE.match(record["commit"]) is not None
+        and isinstance(record.get("note"), str)
+        and is_valid_namespace(repo, record.get("namespace"), checked)
+    )
+
+
+def _note_paths(oid: str) -> list[str]:
+    """Every path a note for `oid` may sit at, from a flat tree to three levels of fanout."""
+    return ["/".join([oid[i:i + 2] for i in range(0, 2 * fanout, 2)] + [oid[2 * fanout:]]) for fanout in range(4)]
+
+
+def import_notes(repo, open_records: Callable[[], Iterable[dict]]) -> tuple[dict, int, int]:
+    """
+    Write records back as notes via `git fast-import`.
+
+    `open_records` is called once to collect the namespaces and then once per
+    namespace, so each namespace becomes exactly one commit on top of its
+    existing notes ref however the records are ordered, without holding them in
+    memory. Malformed records (bad commit OID or namespace) are never written to
+    the fast-import stream, and notes for objects missing from this repository
+    are skipped. Returns ({namespace: imported_count}, skipped_count, invalid_count).
+    """
+    committer = repo.git.execute(["git", "var", "GIT_COMMITTER_IDENT"])
+    existing = set(list_namespaces(repo))
+    checked = {}
+    counts = {}
+    skipped = invalid = 0
+
+    namespaces = {}
+    for record in open_records():
+        if is_valid_record(repo, record, checked):
+            namespaces[record["namespace"]] = None
+        else:
+            invalid += 1
+
+    proc = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"],
+        cwd=repo.git_dir,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    out = proc.stdin
+    try:
+        for namespace in namespaces:
+            for record in open_records():
+                if record.get("namespace") != namespace or not is_valid_record(repo, record, checked):
+                    continue
+                oid = record["commit"]
+                try:
+                    _, obj_type, _ = repo.git.get_object_header(oid)
+                except ValueError:
+                    skipped += 1
+                    continue
+
+                if namespace not in counts:
+                    note_ref = get_note_ref(namespace)
+                    out.write(f"commit {note_ref}\ncommitter {committer}\n".encode())
+                    out.write(_data("Notes added by 'agentnotes import'"))
+                    if namespace in existing:
+                        out.write(f"from {note_ref}^0\n".encode())
+                    counts[namespace] = 0
+
+                if obj_type == b"commit":
+                    out.write(f"N inline {oid}\n".encode())
+                else:
+                    # `N` peels tags to their commit, so notes on tags, trees and blobs are
+                    # written as plain files after dropping any note at another fanout level.
+                    paths = _note_paths(oid)
+                    out.write("".join(f"D {path}\n" for path in paths).encode())
+                    out.write(f"M 100644 inline {paths[0]}\n".encode())
+                out.write(_data(record["note"]))
+                counts[namespace] += 1
+
+        out.write(b"done\n")
+    except BrokenPipeError:
+        pass
+    except BaseException:
+        # Without `done`, fast-import leaves every ref untouched.
+        proc.kill()
+        proc.wait()
+        raise
+    _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"git fast-import failed: {stderr.decode().strip()}")
+    return counts, skipped, invalid
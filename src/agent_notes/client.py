@@ -0,0 +1,146 @@
+"""
+Lightweight `agentnotes` entry point.
+
+Only the standard library is imported here so that, when a daemon is running
+for the current repository, commands are forwarded over its Unix socket
+without paying for typer/GitPython/rich imports. Without a daemon the regular
+CLI runs in-process.
+"""
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from typing import Optional
+
+# Commands that are safe to run inside the daemon. Long-running or
+# file-oriented commands (mcp, sync, export, import, daemon) always run locally.
+FORWARDED_COMMANDS = {"add", "log", "diff", "show"}
+FORWARDED_ENV = ("AGENT_ID", "USER", "EMAIL", "TERM", "COLORTERM", "NO_COLOR", "AGENT_NOTES_NATIVE_READ")
+# GIT_* variables (author/committer identity, config overrides) are forwarded too,
+# except GitPython's own settings, which only matter when it is imported.
+FORWARDED_ENV_PREFIX = "GIT_"
+LOCAL_ENV_PREFIX = "GIT_PYTHON_"
+SOCKET_NAME = "agentnotes.sock"
+# Long enough for a big `diff`, short enough that a wedged daemon cannot hang hooks forever.
+FORWARD_TIMEOUT = 120
+# sun_path is 108 bytes on Linux and 104 on macOS.
+MAX_SOCKET_PATH = 100
+
+
+def find_git_dir(start: str) -> Optional[str]:
+    if os.environ.get("GIT_DIR"):
+        return None
+    path = os.path.abspath(start)
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return os.path.realpath(dot_git)
+        if os.path.isfile(dot_git):
+            # Worktrees and submodules point at their real git dir.
+            with open(dot_git) as f:
+                line = f.readline().strip()
+            if line.startswith("gitdir: "):
+                return os.path.realpath(os.path.join(path, line[8:]))
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def runtime_dir() -> str:
+    """Per-user directory for sockets whose path would be too long inside the git dir."""
+    return os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"agentnotes-{os.getuid()}")
+
+
+def socket_path(git_dir: str) -> str:
+    git_dir = os.path.realpath(git_dir)
+    path = os.path.join(git_dir, SOCKET_NAME)
+    if len(path.encode()) > MAX_SOCKET_PATH:
+        digest = hashlib.sha1(git_dir.encode()).hexdigest()[:16]
+        path = os.path.join(runtime_dir(), f"agentnotes-{digest}.sock")
+    return path
+
+
+def is_own_socket(path: str) -> bool:
+    """True if `path` exists and belongs to the current user, so it is safe to send it our environment."""
+    try:
+        return os.stat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def forwarded_env() -> dict:
+    return {
+        k: v for k, v in os.environ.items()
+        if k in FORWARDED_ENV or (k.startswith(FORWARDED_ENV_PREFIX) and not k.startswith(LOCAL_ENV_PREFIX))
+    }
+
+
+def _exchange(sock: socket.socket, payload: dict) -> dict:
+    sock.sendall(json.dumps(payload).encode() + b"\n")
+    sock.shutdown(socket.SHUT_WR)
+    chunks = []
+    while chunk := sock.recv(65536):
+        chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def send(path: str, payload: dict, timeout: Optional[float] = None) -> dict:
+    """Send one request to the daemon and return its response. Raises OSError if nobody is listening."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        return _exchange(sock, payload)
+
+
+def forward(argv: list[str]) -> Optional[int]:
+    """Run a command in the daemon. Returns its exit code, or None if no daemon is available."""
+    git_dir = find_git_dir(os.getcwd())
+    if git_dir is None:
+        return None
+    path = socket_path(git_dir)
+    if not is_own_socket(path):
+        return None
+
+    payload = {
+        "argv": argv,
+        "env": forwarded_env(),
+        "isatty": sys.stdout.isatty(),
+        "width": shutil.get_terminal_size().columns,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(FORWARD_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            # Stale socket left behind by a daemon that is gone.
+            return None
+        try:
+            response = _exchange(sock, payload)
+        except (OSError, ValueError) as e:
+            # The command may already have run, so do not retry it in-process.
+            sys.stderr.write(f"Error: agentnotes daemon failed to answer: {e}\n")
+            return 1
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response.get("exit_code", 1)
+
+
+def main():
+    argv = sys.argv[1:]
+    if argv and argv[0] in FORWARDED_COMMANDS:
+        exit_code = forward(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from .main import app
+    app(prog_name="agentnotes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Warm per-repository daemon for the agentnotes CLI.
+
+The daemon holds the repository handle and a native object reader with
+daemon-sized caches of objects, parsed trees and note lookups across invocations and serves CLI commands forwarded by `agent_notes.client`
+over a Unix domain socket. Requests are handled one at a time; the daemon
+exits after `idle_timeout` seconds without a request.
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import traceback
+
+from rich.console import Console
+
+from . import main as cli
+from .objects import READ_ERRORS, get_reader
+from .client import FORWARDED_ENV_PREFIX, LOCAL_ENV_PREFIX, send, socket_path
+
+DEFAULT_IDLE_TIMEOUT = 600
+REQUEST_TIMEOUT = 30
+# Entries per reader cache; enough to keep every note of a large repository parsed.
+DAEMON_CACHE_SIZE = 65536
+
+
+def ping(path: str):
+    """Return the daemon's status, or None if nobody is listening on `path`."""
+    try:
+        return send(path, {"command": "ping"}, timeout=2)
+    except (OSError, ValueError):
+        return None
+
+
+class NoteDaemon:
+    def __init__(self, repo, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.repo = repo
+        self.idle_timeout = idle_timeout
+        self.path = socket_path(repo.git_dir)
+        self.started = time.time()
+        self.requests = 0
+        self.running = False
+
+    def _prepare_socket_dir(self):
+        directory = os.path.dirname(self.path)
+        if directory == os.path.realpath(self.repo.git_dir):
+            return
+        # Sockets outside the git dir live in a per-user runtime dir; refuse one anyone else can touch.
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.stat(directory)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise RuntimeError(f"Refusing to use socket directory {directory}: it is not private to this user")
+
+    def serve(self):
+        self._prepare_socket_dir()
+        if os.path.exists(self.path):
+            if ping(self.path) is not None:
+                raise RuntimeError(f"A daemon is already running on {self.path}")
+            os.unlink(self.path)
+
+        # Forwarded commands reuse this handle and the native reader's caches.
+        cli._daemon_repo = self.repo
+        with contextlib.suppress(*READ_ERRORS):
+            get_reader(self.repo.git_dir, self.repo.common_dir, cache_size=DAEMON_CACHE_SIZE)
+        native_read = os.environ.get("AGENT_NOTES_NATIVE_READ")
+        if native_read is None:
+            os.environ["AGENT_NOTES_NATIVE_READ"] = "1"
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        server.settimeout(self.idle_timeout)
+        self.running = True
+        try:
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    self.handle(conn)
+        finally:
+            server.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            cli._daemon_repo = None
+            if native_read is None:
+                os.environ.pop("AGENT_NOTES_NATIVE_READ", None)
+
+    def handle(self, conn: socket.socket):
+        conn.settimeout(REQUEST_TIMEOUT)
+        try:
+            chunks = []
+            while chunk := conn.recv(65536):
+                chunks.append(chunk)
+            try:
+                request = json.loads(b"".join(chunks))
+            except ValueError:
+                request = None
+            if not self.is_valid_request(request):
+                response = {"error": "invalid request", "exit_code": 1, "stdout": "", "stderr": "Error: invalid daemon request\n"}
+            else:
+                response = self.dispatch(request)
+            conn.sendall(json.dumps(response).encode())
+        except Exception:
+            # Nothing a single client does should take the daemon down.
+            traceback.print_exc()
+
+    @staticmethod
+    def is_valid_request(request) -> bool:
+        if not isinstance(request, dict):
+            return False
+        if request.get("command", "run") in ("ping", "shutdown"):
+            return True
+        argv, env = request.get("argv"), request.get("env", {})
+        return (
+            isinstance(argv, list) and all(isinstance(a, str) for a in argv)
+            and isinstance(env, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in env.items())
+        )
+
+    def dispatch(self, request: dict) -> dict:
+        self.requests += 1
+        command = request.get("command", "run")
+        if command == "ping":
+            return {
+                "pid": os.getpid(),
+                "git_dir": self.repo.git_dir,
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "idle_timeout": self.idle_timeout,
+            }
+        if command == "shutdown":
+            self.running = False
+            return {"stopped": True}
+        return self.run(request)
+
+    def run(self, request: dict) -> dict:
+        """Run one CLI invocation with the client's environment and terminal settings."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        env = request.get("env", {})
+        # The caller's GIT_* settings replace the daemon's own, so e.g. notes get the caller's identity.
+        dropped = [
+            k for k in os.environ
+            if k.startswith(FORWARDED_ENV_PREFIX) and not k.startswith(LOCAL_ENV_PREFIX) and k not in env
+        ]
+        saved_env = {k: os.environ.get(k) for k in [*env, *dropped]}
+        saved_console = cli.console
+        exit_code = 0
+        try:
+            for key in dropped:
+                del os.environ[key]
+            os.environ.update(env)
+            cli.console = Console(
+                file=stdout,
+                force_terminal=request.get("isatty", False),
+                width=request.get("width"),
+            )
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    cli.app(args=request["argv"], prog_name="agentnotes")
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            cli.console = saved_console
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def spawn(repo, idle_timeout: int = DEFAULT_IDLE_TIMEOUT, wait: float = 5.0) -> bool:
+    """Start a detached daemon for `repo` and wait until it answers."""
+    subprocess.Popen(
+        [sys.executable, "-m", "agent_notes.client", "daemon", "start", "--foreground", "--idle-timeout", str(idle_timeout)],
+        cwd=repo.working_tree_dir or repo.git_dir,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    path = socket_path(repo.git_dir)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if ping(path) is not None:
+            return True
+        time.sleep(0.05)
+    return False
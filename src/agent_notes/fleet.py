@@ -0,0 +1,141 @@
+"""
+Cross-repository note aggregation.
+
+Each repository is read by its own worker process; per-repo results are
+sorted newest first and merged into one timestamp-ordered stream. A failing
+repository yields an error entry instead of aborting the whole run.
+"""
+import glob
+import heapq
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from git import GitCommandError, Repo
+
+from .main import get_note_ref, read_note
+
+DEFAULT_TYPES = ["decision", "trace", "memory", "intent"]
+
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    """Expand globs and de-duplicate repo paths, keeping the order given."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.expanduser(pattern))) or [pattern]
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _timestamp(note_data: Optional[dict], commit) -> float:
+    try:
+        ts = datetime.fromisoformat(note_data["timestamp"])
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.timestamp()
+    except (TypeError, KeyError, ValueError):
+        return float(commit.committed_date)
+
+
+def _values(value) -> Iterator[str]:
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _values(item)
+    elif value is not None:
+        yield str(value)
+
+
+def _matches(query: str, note_data: Optional[dict], content: str) -> bool:
+    """Match a note's message, agent and data values, not its JSON keys; raw text only for non-JSON notes."""
+    if note_data is None:
+        return query in content.lower()
+    fields = [note_data.get("message"), note_data.get("agent_id"), note_data.get("data")]
+    return any(query in text.lower() for text in _values(fields))
+
+
+def collect(task: dict) -> dict:
+    """
+    Worker entry point: gather the notes of one repository.
+
+    `task` holds the repo `path`, the `mode` (log, diff or search) and its
+    options. Returns {"repo", "notes"} or {"repo", "error"}.
+    """
+    path = task["path"]
+    try:
+        repo = Repo(path)
+        if task["mode"] == "diff":
+            base = task["base"]
+            if base == "main":
+                try:
+                    repo.git.rev_parse("--verify", "main")
+                except GitCommandError:
+                    base = "master"
+            commits = repo.iter_commits(f"{base}..{task['head']}")
+        else:
+            commits = repo.iter_commits(task["ref"], max_count=task["limit"])
+
+        query = (task.get("query") or "").lower()
+        notes = []
+        for commit in commits:
+            for t in task["types"]:
+                try:
+                    content = read_note(repo, get_note_ref(t), commit.hexsha)
+                except GitCommandError:
+                    continue
+                try:
+                    note_data = json.loads(content)
+                except json.JSONDecodeError:
+                    note_data = None
+                if not isinstance(note_data, dict):
+                    note_data = None
+                if query and not _matches(query, note_data, content):
+                    continue
+                notes.append({
+                    "repo": path,
+                    "commit": commit.hexsha,
+                    "type": t,
+                    "agent_id": note_data.get("agent_id", "unknown") if note_data else "unknown",
+                    "message": note_data.get("message", "") if note_data else content,
+                    "timestamp": _timestamp(note_data, commit),
+                    "content": content,
+                })
+        notes.sort(key=lambda n: n["timestamp"], reverse=True)
+        return {"repo": path, "notes": notes}
+    except Exception as e:
+        return {"repo": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def run(tasks: list[dict], jobs: Optional[int] = None) -> tuple[Iterator[dict], list[dict]]:
+    """
+    Fan tasks out over a process pool, at most `jobs` at a time.
+
+    Returns (merged notes, newest first; [{"repo", "error"}, ...]).
+    """
+    if not tasks:
+        return iter(()), []
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    results, errors = [], []
+    # Forking a process that may hold threads or persistent git pipes is unsafe; start clean workers.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = {pool.submit(collect, task): task["path"] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"repo": futures[future], "error": f"{type(e).__name__}: {e}"}
+            if "error" in result:
+                errors.append(result)
+            else:
+                results.append(result["notes"])
+    merged = heapq.merge(*results, key=lambda n: n["timestamp"], reverse=True)
+    return merged, sorted(errors, key=lambda e: e["repo"])
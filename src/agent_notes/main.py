@@ -19,7 +19,12 @@ class AgentNote(BaseModel):
     message: str
     data: Optional[dict] = None
 
+# Set by the daemon so forwarded commands reuse its repository handle.
+_daemon_repo = None
+
 def get_repo():
+    if _daemon_repo is not None:
+        return _daemon_repo
     try:
         return Repo(os.getcwd(), search_parent_directories=True)
     except Exception:
@@ -29,6 +34,23 @@ def get_repo():
 def get_note_ref(note_type: str):
     return f"refs/notes/agent/{note_type}"
 
+def use_native_reader():
+    return os.environ.get("AGENT_NOTES_NATIVE_READ", "").lower() in ("1", "true", "yes")
+
+def read_note(repo, note_ref: str, rev: str) -> str:
+    """Read a note, using the pure-Python object reader when enabled and falling back to git."""
+    if use_native_reader():
+        from .objects import get_reader, READ_ERRORS
+        try:
+            content = get_reader(repo.git_dir, repo.common_dir).read_note(note_ref, rev)
+        except READ_ERRORS:
+            pass
+        else:
+            if content is None:
+                raise GitCommandError(["git", "notes", "--ref", note_ref, "show", rev], 1, f"no note found for object {rev}")
+            return content
+    return repo.git.execute(["git", "notes", "--ref", note_ref, "show", rev])
+
 def get_default_agent_id():
     return os.environ.get("AGENT_ID") or os.environ.get("USER") or "unknown-agent"
 
@@ -121,7 +143,7 @@ def log(
                 for t in types:
                     note_ref = get_note_ref(t)
                     try:
-                        content = repo.git.execute(["git", "notes", "--ref", note_ref, "show", commit.hexsha])
+                        content = read_note(repo, note_ref, commit.hexsha)
                         note_data = json.loads(content)
                         
                         commit_display = commit.hexsha[:8]
@@ -151,7 +173,7 @@ def log(
                 for t in types:
                     note_ref = get_note_ref(t)
                     try:
-                        content = repo.git.execute(["git", "notes", "--ref", note_ref, "show", commit.hexsha])
+                        content = read_note(repo, note_ref, commit.hexsha)
                         if not commit_found:
                             typer.echo(f"\nCOMMIT: {commit.hexsha[:8]}")
                             commit_found = True
@@ -205,7 +227,7 @@ def diff(
                 for t in types:
                     note_ref = get_note_ref(t)
                     try:
-                        content = repo.git.execute(["git", "notes", "--ref", note_ref, "show", commit.hexsha])
+                        content = read_note(repo, note_ref, commit.hexsha)
                         note_data = json.loads(content)
 
                         commit_display = commit.hexsha[:8]
@@ -236,7 +258,7 @@ def diff(
                 for t in types:
                     note_ref = get_note_ref(t)
                     try:
-                        content = repo.git.execute(["git", "notes", "--ref", note_ref, "show", commit.hexsha])
+                        content = read_note(repo, note_ref, commit.hexsha)
                         if not commit_found:
                             typer.echo(f"\nCOMMIT: {commit.hexsha[:8]}")
                             commit_found = True
@@ -266,7 +288,7 @@ def show(
     for t in types:
         note_ref = get_note_ref(t)
         try:
-            content = repo.git.execute(["git", "notes", "--ref", note_ref, "show", ref])
+            content = read_note(repo, note_ref, ref)
             if rich:
                 try:
                     note_data = json.loads(content)
@@ -304,6 +326,205 @@ def sync():
     except GitCommandError as e:
         typer.echo(f"Sync failed: {e}")
 
+@app.command()
+def export(
+    path: str = typer.Argument(..., help="Output file (.jsonl.gz or .parquet)"),
+    format: Optional[str] = typer.Option(None, help="Archive format: jsonl or parquet (inferred from the file name)"),
+    type: Optional[str] = typer.Option(None, help="Only export this note type (default: every namespace)"),
+):
+    """Stream every agent note into a gzip JSONL or Parquet archive."""
+    from .archive import FORMATS, detect_format, iter_notes, write_jsonl, write_parquet
+    repo = get_repo()
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        typer.echo(f"Error: Unknown format '{format}'. Use one of: {', '.join(FORMATS)}")
+        raise typer.Exit(code=1)
+
+    try:
+        records = iter_notes(repo, [type] if type else None)
+        count = write_parquet(records, path) if format == "parquet" else write_jsonl(records, path)
+        typer.echo(f"Exported {count} notes to {path}")
+    except (GitCommandError, RuntimeError, OSError) as e:
+        typer.echo(f"Export failed: {e}")
+        raise typer.Exit(code=1)
+
+@app.command("import")
+def import_(
+    path: str = typer.Argument(..., help="Archive written by 'agentnotes export'"),
+    format: Optional[str] = typer.Option(None, help="Archive format: jsonl or parquet (inferred from the file name)"),
+):
+    """Import agent notes from an archive, one notes commit per namespace."""
+    from .archive import FORMATS, detect_format, import_notes, read_jsonl, read_parquet
+    repo = get_repo()
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        typer.echo(f"Error: Unknown format '{format}'. Use one of: {', '.join(FORMATS)}")
+        raise typer.Exit(code=1)
+
+    try:
+        read = read_parquet if format == "parquet" else read_jsonl
+        counts, skipped, invalid = import_notes(repo, lambda: read(path))
+    except (GitCommandError, RuntimeError, OSError, ValueError, KeyError) as e:
+        typer.echo(f"Import failed: {e}")
+        raise typer.Exit(code=1)
+
+    for namespace, count in counts.items():
+        typer.echo(f"Imported {count} {namespace} notes")
+    if skipped:
+        typer.echo(f"Skipped {skipped} notes for objects not present in this repository")
+    if invalid:
+        typer.echo(f"Skipped {invalid} invalid records (malformed commit OID or namespace)")
+
+fleet_app = typer.Typer(
+    help="Aggregate agentic notes across many repositories in parallel",
+    no_args_is_help=True
+)
+app.add_typer(fleet_app, name="fleet")
+
+def print_fleet(notes, errors, title: str, rich: bool):
+    """Render merged fleet notes (newest first) followed by any per-repo errors."""
+    if rich:
+        table = Table(title=title, box=box.ROUNDED, expand=True)
+        table.add_column("Repo", style="blue", no_wrap=True)
+        table.add_column("Commit", style="cyan", no_wrap=True)
+        table.add_column("Type", style="magenta")
+        table.add_column("Agent", style="green")
+        table.add_column("Message", style="italic")
+        for note in notes:
+            table.add_row(
+                os.path.basename(note["repo"]),
+                note["commit"][:8],
+                note["type"],
+                note["agent_id"],
+                note["message"]
+            )
+        console.print(table)
+        for error in errors:
+            console.print(f"[red]{error['repo']}: {error['error']}[/red]")
+    else:
+        typer.echo(f"--- {title} ---")
+        for note in notes:
+            typer.echo(f"{note['repo']} {note['commit'][:8]} [{note['type']}]: {note['content']}")
+        for error in errors:
+            typer.echo(f"ERROR {error['repo']}: {error['error']}")
+
+def run_fleet(mode: str, paths: list[str], type: Optional[str], jobs: Optional[int], **options):
+    from .fleet import DEFAULT_TYPES, expand_paths, run
+    repos = expand_paths(paths)
+    tasks = [
+        {"path": path, "mode": mode, "types": [type] if type else DEFAULT_TYPES, **options}
+        for path in repos
+    ]
+    notes, errors = run(tasks, jobs=jobs)
+    return repos, notes, errors
+
+@fleet_app.command("log")
+def fleet_log(
+    paths: list[str] = typer.Argument(..., help="Repository paths or globs"),
+    limit: int = typer.Option(20, help="Number of commits to check per repository"),
+    ref: str = typer.Option("HEAD", help="Git reference to start from in each repository"),
+    type: Optional[str] = typer.Option(None, help="Filter by note type"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Maximum repositories read at once (default: CPU count)"),
+    rich: bool = typer.Option(True, "--rich/--plain", help="Use Rich for beautiful output"),
+):
+    """Show agentic notes for the last N commits of every repository."""
+    repos, notes, errors = run_fleet("log", paths, type, jobs, ref=ref, limit=limit)
+    print_fleet(notes, errors, f"Agentic Memory: {len(repos)} repositories", rich)
+    if errors and len(errors) == len(repos):
+        raise typer.Exit(code=1)
+
+@fleet_app.command("diff")
+def fleet_diff(
+    paths: list[str] = typer.Argument(..., help="Repository paths or globs"),
+    base: str = typer.Option("main", help="Base branch/ref to compare against"),
+    head: str = typer.Option("HEAD", help="Head ref to compare from"),
+    type: Optional[str] = typer.Option(None, help="Filter by note type"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Maximum repositories read at once (default: CPU count)"),
+    rich: bool = typer.Option(True, "--rich/--plain", help="Use Rich for beautiful output"),
+):
+    """Show agentic notes between base and head in every repository."""
+    repos, notes, errors = run_fleet("diff", paths, type, jobs, base=base, head=head)
+    print_fleet(notes, errors, f"Agentic Memory: {base}..{head} across {len(repos)} repositories", rich)
+    if errors and len(errors) == len(repos):
+        raise typer.Exit(code=1)
+
+@fleet_app.command("search")
+def fleet_search(
+    query: str = typer.Argument(..., help="Case-insensitive text to look for in notes"),
+    paths: list[str] = typer.Argument(..., help="Repository paths or globs"),
+    limit: int = typer.Option(100, help="Number of commits to search per repository"),
+    ref: str = typer.Option("HEAD", help="Git reference to start from in each repository"),
+    type: Optional[str] = typer.Option(None, help="Filter by note type"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Maximum repositories read at once (default: CPU count)"),
+    rich: bool = typer.Option(True, "--rich/--plain", help="Use Rich for beautiful output"),
+):
+    """Search agentic notes across every repository."""
+    repos, notes, errors = run_fleet("search", paths, type, jobs, ref=ref, limit=limit, query=query)
+    print_fleet(notes, errors, f"Agentic Memory: '{query}' across {len(repos)} repositories", rich)
+    if errors and len(errors) == len(repos):
+        raise typer.Exit(code=1)
+
+daemon_app = typer.Typer(
+    help="Manage the warm per-repo daemon that the CLI forwards commands to",
+    no_args_is_help=True
+)
+app.add_typer(daemon_app, name="daemon")
+
+@daemon_app.command("start")
+def daemon_start(
+    idle_timeout: int = typer.Option(600, help="Seconds without a request before the daemon exits"),
+    foreground: bool = typer.Option(False, "--foreground", help="Run in this process instead of detaching"),
+):
+    """Start the daemon for the current repository."""
+    from .client import socket_path
+    from .daemon import NoteDaemon, ping, spawn
+    repo = get_repo()
+    path = socket_path(repo.git_dir)
+
+    if ping(path) is not None:
+        typer.echo(f"Daemon already running on {path}")
+        return
+
+    if foreground:
+        try:
+            NoteDaemon(repo, idle_timeout=idle_timeout).serve()
+        except RuntimeError as e:
+            typer.echo(f"Error: {e}")
+            raise typer.Exit(code=1)
+        return
+
+    if spawn(repo, idle_timeout=idle_timeout):
+        typer.echo(f"Daemon started on {path}")
+    else:
+        typer.echo("Error: Daemon did not come up. Try 'agentnotes daemon start --foreground' to see why.")
+        raise typer.Exit(code=1)
+
+@daemon_app.command("stop")
+def daemon_stop():
+    """Stop the daemon for the current repository."""
+    from .client import send, socket_path
+    repo = get_repo()
+    try:
+        send(socket_path(repo.git_dir), {"command": "shutdown"}, timeout=5)
+        typer.echo("Daemon stopped.")
+    except (OSError, ValueError):
+        typer.echo("No daemon running.")
+
+@daemon_app.command("status")
+def daemon_status():
+    """Show whether the daemon for the current repository is running."""
+    from .client import socket_path
+    from .daemon import ping
+    repo = get_repo()
+    status = ping(socket_path(repo.git_dir))
+    if status is None:
+        typer.echo("No daemon running.")
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"Daemon running (pid {status['pid']}, up {status['uptime']}s, "
+        f"{status['requests']} requests, idle timeout {status['idle_timeout']}s)"
+    )
+
 @app.command()
 def mcp():
     """Run the FastMCP server."""
@@ -0,0 +1,436 @@
+"""
+Pure-Python reader for the git object database.
+
+Resolves refs from loose and packed refs, reads loose objects and
+memory-maps packfiles to look objects up through their v2 index. Anything
+this module does not understand raises UnsupportedRepoError so callers can
+fall back to the git binary.
+"""
+import mmap
+import re
+import struct
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+HEX_RE = re.compile(r"^[0-9a-f]{40}$")
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+DEFAULT_CACHE_SIZE = 256
+
+# Far beyond git's own pack.depth limit of 4095; anything longer is treated as corrupt.
+MAX_DELTA_CHAIN = 10_000
+
+TYPE_NAMES = {b"commit": OBJ_COMMIT, b"tree": OBJ_TREE, b"blob": OBJ_BLOB, b"tag": OBJ_TAG}
+
+_MISSING = object()
+
+
+class UnsupportedRepoError(Exception):
+    """Raised when the repository uses a layout this reader cannot handle."""
+
+
+# Everything a malformed or unexpected repository can make the reader raise.
+READ_ERRORS = (UnsupportedRepoError, OSError, ValueError, IndexError, struct.error, zlib.error)
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+            return self._data[key]
+        except KeyError:
+            return default
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    pos = 0
+
+    def read_varint():
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = delta[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+    src_size = read_varint()
+    dst_size = read_varint()
+    if src_size != len(base):
+        raise UnsupportedRepoError("delta base size mismatch")
+
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            if size == 0:
+                size = 0x10000
+            out += base[offset:offset + size]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise UnsupportedRepoError("invalid delta opcode")
+
+    if len(out) != dst_size:
+        raise UnsupportedRepoError("delta result size mismatch")
+    return bytes(out)
+
+
+class Pack:
+    """A memory-mapped .pack/.idx pair (index version 2 only)."""
+
+    def __init__(self, idx_path: Path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path.with_suffix(".pack")
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.idx[:8] != b"\377tOc\x00\x00\x00\x02":
+            raise UnsupportedRepoError(f"unsupported pack index format: {idx_path}")
+        if self.pack[:4] != b"PACK":
+            raise UnsupportedRepoError(f"not a packfile: {self.pack_path}")
+
+        self.count = struct.unpack_from(">I", self.idx, 8 + 255 * 4)[0]
+        self._sha_start = 8 + 256 * 4
+        self._offset_start = self._sha_start + 24 * self.count
+        self._large_start = self._offset_start + 4 * self.count
+
+    def close(self):
+        self.idx.close()
+        self.pack.close()
+
+    def _fanout(self, byte: int) -> int:
+        if byte < 0:
+            return 0
+        return struct.unpack_from(">I", self.idx, 8 + byte * 4)[0]
+
+    def _sha_at(self, i: int) -> bytes:
+        start = self._sha_start + 20 * i
+        return self.idx[start:start + 20]
+
+    def find_offset(self, oid: bytes) -> Optional[int]:
+        lo, hi = self._fanout(oid[0] - 1), self._fanout(oid[0])
+        i = bisect_left(range(self.count), oid, lo, hi, key=self._sha_at)
+        if i >= hi or self._sha_at(i) != oid:
+            return None
+        offset = struct.unpack_from(">I", self.idx, self._offset_start + 4 * i)[0]
+        if offset & 0x80000000:
+            large = offset & 0x7FFFFFFF
+            offset = struct.unpack_from(">Q", self.idx, self._large_start + 8 * large)[0]
+        return offset
+
+    def _inflate(self, pos: int, size: int) -> bytes:
+        d = zlib.decompressobj()
+        out = bytearray()
+        chunk = max(size, 4096)
+        while not d.eof:
+            if pos >= len(self.pack):
+                raise UnsupportedRepoError("truncated packfile")
+            out += d.decompress(self.pack[pos:pos + chunk])
+            pos += chunk
+        if len(out) != size:
+            raise UnsupportedRepoError("inflated size mismatch")
+        return bytes(out)
+
+    def read_raw(self, offset: int):
+        """Return (type, size, header_end, base) without inflating the body."""
+        pos = offset
+        byte = self.pack[pos]
+        pos += 1
+        obj_type = (byte >> 4) & 0x7
+        size = byte & 0x0F
+        shift = 4
+        while byte & 0x80:
+            byte = self.pack[pos]
+            pos += 1
+            size |= (byte & 0x7F) << shift
+            shift += 7
+
+        base = None
+        if obj_type == OBJ_OFS_DELTA:
+            byte = self.pack[pos]
+            pos += 1
+            rel = byte & 0x7F
+            while byte & 0x80:
+                byte = self.pack[pos]
+                pos += 1
+                rel = ((rel + 1) << 7) | (byte & 0x7F)
+            base = offset - rel
+        elif obj_type == OBJ_REF_DELTA:
+            base = self.pack[pos:pos + 20]
+            pos += 20
+        elif obj_type not in (OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG):
+            raise UnsupportedRepoError(f"unknown pack object type {obj_type}")
+        return obj_type, size, pos, base
+
+
+class ObjectReader:
+    """
+    Reads refs and objects straight from a repository's common git dir.
+
+    Inflated objects, parsed trees and note lookups are kept in LRU caches of
+    `cache_size` entries each. Objects are immutable, so a lookup keyed by
+    (notes commit, target) stays valid until the notes ref moves on.
+    """
+
+    def __init__(self, git_dir: str, common_dir: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.git_dir = Path(git_dir)
+        self.common_dir = Path(common_dir or git_dir)
+        self.objects_dir = self.common_dir / "objects"
+        self.cache_size = cache_size
+        self.cache = LRUCache(cache_size)
+        self.trees = LRUCache(cache_size)
+        self.notes = LRUCache(cache_size)
+        self._packs = None
+        self._packed = (None, {})
+
+        if (self.common_dir / "reftable").exists():
+            raise UnsupportedRepoError("reftable ref storage")
+        if (self.objects_dir / "info" / "alternates").exists():
+            raise UnsupportedRepoError("alternate object stores")
+
+    # --- refs ---
+
+    def _packed_refs(self) -> dict:
+        path = self.common_dir / "packed-refs"
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return {}
+        # Reparse only when git has rewritten the file.
+        key = (st.st_mtime_ns, st.st_size)
+        if self._packed[0] == key:
+            return self._packed[1]
+        refs = {}
+        for line in path.read_text().splitlines():
+            if not line or line[0] in "#^":
+                continue
+            oid, _, name = line.partition(" ")
+            refs[name] = oid
+        self._packed = (key, refs)
+        return refs
+
+    def resolve_ref(self, name: str, depth: int = 0) -> Optional[str]:
+        """Resolve a full ref name (or HEAD) to a hex OID, or None if it does not exist."""
+        if depth > 5:
+            raise UnsupportedRepoError(f"symbolic ref loop at {name}")
+        base = self.git_dir if name == "HEAD" else self.common_dir
+        try:
+            value = (base / name).read_text().strip()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            value = self._packed_refs().get(name)
+            if value is None:
+                return None
+        if value.startswith("ref: "):
+            return self.resolve_ref(value[5:], depth + 1)
+        if not HEX_RE.match(value):
+            raise UnsupportedRepoError(f"unrecognised ref value for {name}")
+        return value
+
+    def resolve_rev(self, rev: str) -> str:
+        """Resolve the simple revisions the CLI passes around (full hex OIDs, HEAD, full ref names)."""
+        if HEX_RE.match(rev):
+            return rev
+        if rev == "HEAD" or rev.startswith("refs/"):
+            oid = self.resolve_ref(rev)
+            if oid is not None:
+                return oid
+        raise UnsupportedRepoError(f"cannot resolve revision {rev!r} natively")
+
+    # --- objects ---
+
+    def _load_packs(self):
+        pack_dir = self.objects_dir / "pack"
+        paths = sorted(pack_dir.glob("*.idx")) if pack_dir.exists() else []
+        # Keep packs we already mapped; close the ones a gc or repack removed.
+        loaded = {pack.idx_path: pack for pack in self._packs or []}
+        for path in loaded.keys() - set(paths):
+            loaded[path].close()
+        self._packs = [loaded.get(path) or Pack(path) for path in paths]
+
+    def _read_loose(self, hexsha: str):
+        path = self.objects_dir / hexsha[:2] / hexsha[2:]
+        try:
+            raw = zlib.decompress(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        header, _, body = raw.partition(b"\0")
+        type_name, _, size = header.partition(b" ")
+        if type_name not in TYPE_NAMES or int(size) != len(body):
+            raise UnsupportedRepoError(f"malformed loose object {hexsha}")
+        return TYPE_NAMES[type_name], body
+
+    def _read_packed(self, pack: Pack, offset: int):
+        # Walk the delta chain iteratively: pack.depth allows chains thousands of objects long.
+        chain = []
+        while True:
+            if len(chain) > MAX_DELTA_CHAIN:
+                raise UnsupportedRepoError("delta chain too long")
+            key = (pack.pack_path, offset)
+            cached = self.cache.get(key)
+            if cached is not None:
+                obj_type, data = cached
+                break
+
+            obj_type, size, pos, base = pack.read_raw(offset)
+            if obj_type == OBJ_OFS_DELTA:
+                chain.append((key, pack._inflate(pos, size)))
+                offset = base
+            elif obj_type == OBJ_REF_DELTA:
+                chain.append((key, pack._inflate(pos, size)))
+                base_hex = base.hex()
+                loose = self.cache.get(base_hex) or self._read_loose(base_hex)
+                if loose is not None:
+                    obj_type, data = loose
+                    break
+                pack, offset = self._find_packed(base_hex)
+            else:
+                data = pack._inflate(pos, size)
+                self.cache.put(key, (obj_type, data))
+                break
+
+        for key, delta in reversed(chain):
+            data = apply_delta(data, delta)
+            self.cache.put(key, (obj_type, data))
+        return obj_type, data
+
+    def _search_packs(self, oid: bytes):
+        for pack in self._packs:
+            offset = pack.find_offset(oid)
+            if offset is not None:
+                return pack, offset
+        return None
+
+    def _find_packed(self, hexsha: str):
+        if self._packs is None:
+            self._load_packs()
+        oid = bytes.fromhex(hexsha)
+        found = self._search_packs(oid)
+        if found is None:
+            # A fetch or gc may have written new packs since we last looked.
+            self._load_packs()
+            found = self._search_packs(oid)
+        if found is None:
+            raise UnsupportedRepoError(f"object {hexsha} not found")
+        return found
+
+    def read_object(self, hexsha: str):
+        """Return (type, bytes) for an object, inflating and resolving deltas as needed."""
+        cached = self.cache.get(hexsha)
+        if cached is not None:
+            return cached
+
+        obj = self._read_loose(hexsha)
+        if obj is None:
+            obj = self._read_packed(*self._find_packed(hexsha))
+
+        self.cache.put(hexsha, obj)
+        return obj
+
+    def read_tree(self, hexsha: str) -> dict:
+        cached = self.trees.get(hexsha)
+        if cached is not None:
+            return cached
+
+        obj_type, data = self.read_object(hexsha)
+        if obj_type != OBJ_TREE:
+            raise UnsupportedRepoError(f"{hexsha} is not a tree")
+        entries = {}
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            mode = data[pos:space]
+            name = data[space + 1:nul].decode("utf-8", "surrogateescape")
+            entries[name] = (mode, data[nul + 1:nul + 21].hex())
+            pos = nul + 21
+        self.trees.put(hexsha, entries)
+        return entries
+
+    def commit_tree(self, hexsha: str) -> str:
+        obj_type, data = self.read_object(hexsha)
+        if obj_type != OBJ_COMMIT or not data.startswith(b"tree "):
+            raise UnsupportedRepoError(f"{hexsha} is not a commit")
+        return data[5:45].decode()
+
+    # --- notes ---
+
+    def read_note(self, note_ref: str, rev: str) -> Optional[str]:
+        """Return the note attached to `rev` under `note_ref`, or None if there is none."""
+        notes_commit = self.resolve_ref(note_ref)
+        if notes_commit is None:
+            return None
+        target = self.resolve_rev(rev)
+
+        key = (notes_commit, target)
+        cached = self.notes.get(key, _MISSING)
+        if cached is _MISSING:
+            cached = self._lookup_note(notes_commit, target)
+            self.notes.put(key, cached)
+        return cached
+
+    def _lookup_note(self, notes_commit: str, target: str) -> Optional[str]:
+        tree = self.commit_tree(notes_commit)
+        remaining = target
+        while True:
+            entries = self.read_tree(tree)
+            if remaining in entries:
+                mode, oid = entries[remaining]
+                obj_type, data = self.read_object(oid)
+                if obj_type != OBJ_BLOB:
+                    raise UnsupportedRepoError(f"note for {target} is not a blob")
+                text = data.decode("utf-8")
+                # Match `git notes show` as seen through GitPython, which drops one trailing newline.
+                return text[:-1] if text.endswith("\n") else text
+            # Notes trees fan out into two-character directories as they grow.
+            subtree = entries.get(remaining[:2])
+            if subtree is None or subtree[0] != b"40000":
+                return None
+            tree = subtree[1]
+            remaining = remaining[2:]
+
+
+_readers = {}
+
+
+def get_reader(git_dir: str, common_dir: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE) -> ObjectReader:
+    """Return the shared reader for a repository, replacing it if a larger cache is asked for."""
+    key = (git_dir, common_dir)
+    reader = _readers.get(key)
+    if reader is None or reader.cache_size < cache_size:
+        reader = _readers[key] = ObjectReader(git_dir, common_dir, cache_size)
+    return reader
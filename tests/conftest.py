@@ -0,0 +1,22 @@
+import os
+import pytest
+from git import Repo
+
+@pytest.fixture
+def temp_repo(tmp_path):
+    """Create a temporary git repository for testing."""
+    repo_path = tmp_path / "test-repo"
+    repo_path.mkdir()
+    repo = Repo.init(repo_path)
+    
+    # Create a dummy file and commit it
+    dummy_file = repo_path / "dummy.txt"
+    dummy_file.write_text("hello")
+    repo.index.add([str(dummy_file)])
+    repo.index.commit("Initial commit")
+    
+    # Change to the repo directory
+    old_cwd = os.getcwd()
+    os.chdir(repo_path)
+    yield repo_path
+    os.chdir(old_cwd)
@@ -0,0 +1,137 @@
+import json
+import subprocess
+import pytest
+from git import Repo
+from typer.testing import CliRunner
+from agent_notes.main import app
+
+runner = CliRunner()
+
+def notes(repo, namespace):
+    return repo.git.execute(["git", "notes", "--ref", f"refs/notes/agent/{namespace}", "list"])
+
+@pytest.fixture
+def noted_repo(temp_repo):
+    repo = Repo(temp_repo)
+    runner.invoke(app, ["add", "First decision"])
+    runner.invoke(app, ["add", "Some trace", "--type", "trace", "--data", '{"step": 1}'])
+    (temp_repo / "new.txt").write_text("new")
+    repo.index.add(["new.txt"])
+    repo.index.commit("Second commit")
+    runner.invoke(app, ["add", "Second decision"])
+    return repo
+
+@pytest.mark.parametrize("filename", ["notes.jsonl.gz", "notes.parquet"])
+def test_export_import_roundtrip(noted_repo, tmp_path, monkeypatch, filename):
+    """Exported notes import into a clone with identical note blobs."""
+    if filename.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    archive = tmp_path / filename
+    result = runner.invoke(app, ["export", str(archive)])
+    assert result.exit_code == 0
+    assert "Exported 3 notes" in result.output
+
+    clone = Repo.clone_from(noted_repo.working_tree_dir, tmp_path / "clone")
+    monkeypatch.chdir(clone.working_tree_dir)
+    result = runner.invoke(app, ["import", str(archive)])
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 decision notes" in result.output
+    assert "Imported 1 trace notes" in result.output
+    for namespace in ("decision", "trace"):
+        assert notes(clone, namespace) == notes(noted_repo, namespace)
+    # One notes commit per namespace.
+    assert len(list(clone.iter_commits("refs/notes/agent/decision"))) == 1
+
+def test_import_interleaved_namespaces(noted_repo, tmp_path):
+    """Records need not be grouped: each namespace still gets exactly one notes commit."""
+    head, parent = noted_repo.head.commit, noted_repo.head.commit.parents[0]
+    records = [
+        {"namespace": "alpha", "commit": head.hexsha, "note": "a1"},
+        {"namespace": "beta", "commit": head.hexsha, "note": "b1"},
+        {"namespace": "alpha", "commit": parent.hexsha, "note": "a2"},
+        {"namespace": "beta", "commit": parent.hexsha, "note": "b2"},
+    ]
+    archive = tmp_path / "notes.jsonl"
+    archive.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    result = runner.invoke(app, ["import", str(archive)])
+    assert result.exit_code == 0, result.output
+    assert "Imported 2 alpha notes" in result.output
+    assert "Imported 2 beta notes" in result.output
+    for namespace in ("alpha", "beta"):
+        assert len(list(noted_repo.iter_commits(f"refs/notes/agent/{namespace}"))) == 1
+
+def test_import_note_on_annotated_tag(noted_repo, tmp_path, monkeypatch):
+    """Notes on non-commit objects round-trip onto the object itself, not the commit it points to."""
+    noted_repo.create_tag("v1", message="Release")
+    result = runner.invoke(app, ["add", "Release decision", "--ref", "v1"])
+    assert result.exit_code == 0, result.output
+    archive = tmp_path / "notes.jsonl.gz"
+    assert runner.invoke(app, ["export", str(archive)]).exit_code == 0
+
+    clone = Repo.clone_from(noted_repo.working_tree_dir, tmp_path / "clone")
+    monkeypatch.chdir(clone.working_tree_dir)
+    result = runner.invoke(app, ["import", str(archive)])
+    assert result.exit_code == 0, result.output
+    assert "Imported 3 decision notes" in result.output
+    assert notes(clone, "decision") == notes(noted_repo, "decision")
+    tag_note = clone.git.execute(["git", "notes", "--ref", "refs/notes/agent/decision", "show", "v1"])
+    assert "Release decision" in tag_note
+
+def test_import_on_top_of_existing_notes(noted_repo, tmp_path):
+    """Importing keeps history on an existing notes ref and skips unknown commits."""
+    archive = tmp_path / "notes.jsonl"
+    archive.write_text(
+        '{"namespace": "decision", "commit": "%s", "note": "imported"}\n'
+        '{"namespace": "decision", "commit": "%s", "note": "orphan"}\n'
+        % (noted_repo.head.commit.parents[0].hexsha, "1" * 40)
+    )
+    before = len(list(noted_repo.iter_commits("refs/notes/agent/decision")))
+
+    result = runner.invoke(app, ["import", str(archive)])
+    assert result.exit_code == 0
+    assert "Imported 1 decision notes" in result.output
+    assert "Skipped 1 notes" in result.output
+    assert len(list(noted_repo.iter_commits("refs/notes/agent/decision"))) == before + 1
+
+    result_show = runner.invoke(app, ["show", "HEAD~1", "--type", "decision", "--plain"])
+    assert "imported" in result_show.output
+
+def test_import_rejects_malicious_records(noted_repo, tmp_path):
+    """Namespaces or OIDs that could inject fast-import commands are never written."""
+    head = noted_repo.head.commit.hexsha
+    branch_before = noted_repo.heads[0].commit.hexsha
+    records = [
+        {"namespace": f"x\ncommitter a <a> 0 +0000\ndata 0\n\nreset refs/heads/victim\nfrom {head}\n\ncommit refs/notes/agent/y", "commit": head, "note": "evil"},
+        {"namespace": "bad..name", "commit": head, "note": "evil"},
+        {"namespace": "decision", "commit": f"{head}\nreset refs/heads/victim", "note": "evil"},
+        {"namespace": "decision", "commit": head, "note": "fine"},
+    ]
+    archive = tmp_path / "notes.jsonl"
+    archive.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    result = runner.invoke(app, ["import", str(archive), "--format", "jsonl"])
+    assert result.exit_code == 0, result.output
+    assert "Imported 1 decision notes" in result.output
+    assert "Skipped 3 invalid records" in result.output
+    assert "victim" not in [h.name for h in noted_repo.heads]
+    assert noted_repo.heads[0].commit.hexsha == branch_before
+    assert not noted_repo.git.execute(["git", "for-each-ref", "refs/notes/agent/x", "refs/notes/agent/y"])
+
+def test_export_non_utf8_note(noted_repo, tmp_path, monkeypatch):
+    """Notes that are not valid UTF-8 round-trip byte for byte."""
+    blob = noted_repo.git.execute(["git", "hash-object", "-w", "--stdin"], istream=subprocess.PIPE, as_process=True)
+    blob.proc.stdin.write(b"\xff\xfe raw bytes\n")
+    blob.proc.stdin.close()
+    oid = blob.proc.stdout.read().decode().strip()
+    blob.wait()
+    noted_repo.git.execute(["git", "notes", "--ref", "refs/notes/agent/raw", "add", "-C", oid, "HEAD"])
+
+    archive = tmp_path / "notes.jsonl.gz"
+    result = runner.invoke(app, ["export", str(archive), "--type", "raw"])
+    assert result.exit_code == 0, result.output
+
+    noted_repo.git.execute(["git", "update-ref", "-d", "refs/notes/agent/raw"])
+    result = runner.invoke(app, ["import", str(archive)])
+    assert result.exit_code == 0, result.output
+    assert notes(noted_repo, "raw").split()[0] == oid
@@ -1,6 +1,4 @@
-import os
 import json
-import pytest
 from pathlib import Path
 from git import Repo
 from typer.testing import CliRunner
@@ -9,25 +7,6 @@ from agent_notes.dx import app as dx_app
 
 runner = CliRunner()
 
-@pytest.fixture
-def temp_repo(tmp_path):
-    """Create a temporary git repository for testing."""
-    repo_path = tmp_path / "test-repo"
-    repo_path.mkdir()
-    repo = Repo.init(repo_path)
-    
-    # Create a dummy file and commit it
-    dummy_file = repo_path / "dummy.txt"
-    dummy_file.write_text("hello")
-    repo.index.add([str(dummy_file)])
-    repo.index.commit("Initial commit")
-    
-    # Change to the repo directory
-    old_cwd = os.getcwd()
-    os.chdir(repo_path)
-    yield repo_path
-    os.chdir(old_cwd)
-
 def test_add_note(temp_repo):
     """Test adding an agent note."""
     result = runner.invoke(app, ["add", "Test decision message", "--agent-id", "test-agent"])
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+import pytest
+from git import Repo
+from typer.testing import CliRunner
+from agent_notes.main import app
+from agent_notes.client import forward, forwarded_env, send, socket_path
+from agent_notes.daemon import DAEMON_CACHE_SIZE, NoteDaemon, ping
+from agent_notes.objects import get_reader
+
+runner = CliRunner()
+
+@pytest.fixture
+def daemon(temp_repo):
+    """Run a daemon for the temp repo in a background thread."""
+    server = NoteDaemon(Repo(temp_repo), idle_timeout=30)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if ping(server.path) is not None:
+            break
+        time.sleep(0.01)
+    yield server
+    server.running = False
+    ping(server.path)
+    thread.join(timeout=5)
+
+def test_forward_without_daemon(temp_repo):
+    """Without a daemon the client falls back to running in-process."""
+    assert forward(["log", "--plain"]) is None
+
+def test_forward_to_daemon(daemon, capsys):
+    """Commands forwarded to the daemon run against its repo and return their output."""
+    assert forward(["add", "Daemon note", "--agent-id", "daemon-agent"]) == 0
+    assert "Successfully added decision note" in capsys.readouterr().out
+
+    assert forward(["show", "HEAD", "--plain"]) == 0
+    output = capsys.readouterr().out
+    assert "Daemon note" in output
+    assert "daemon-agent" in output
+
+    assert forward(["add", "Duplicate"]) == 1
+    assert ping(daemon.path)["requests"] >= 4
+    # Forwarded reads share the daemon's large reader caches.
+    assert get_reader(daemon.repo.git_dir, daemon.repo.common_dir).cache_size == DAEMON_CACHE_SIZE
+
+def test_daemon_idle_timeout(temp_repo):
+    """The daemon exits and removes its socket after the idle timeout."""
+    server = NoteDaemon(Repo(temp_repo), idle_timeout=0.2)
+    server.serve()
+    assert not os.path.exists(socket_path(Repo(temp_repo).git_dir))
+
+def test_daemon_status_command(daemon):
+    """The CLI reports the running daemon."""
+    result = runner.invoke(app, ["daemon", "status"])
+    assert result.exit_code == 0
+    assert "Daemon running" in result.output
+
+    result = runner.invoke(app, ["daemon", "stop"])
+    assert "Daemon stopped." in result.output
+
+def test_daemon_survives_bad_requests(daemon):
+    """Requests that are not JSON objects get an error response instead of killing the daemon."""
+    for payload in ([], "run", {"argv": "log"}, {"argv": ["show"], "env": {"A": 1}}):
+        response = send(daemon.path, payload, timeout=5)
+        assert response["exit_code"] == 1
+        assert "invalid" in response["stderr"]
+    assert ping(daemon.path) is not None
+
+def test_forward_ignores_foreign_socket(daemon, monkeypatch):
+    """A socket owned by another user is never sent our environment."""
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(daemon.path).st_uid + 1)
+    assert forward(["log", "--plain"]) is None
+
+def test_forwarded_add_uses_caller_identity(daemon, monkeypatch):
+    """Forwarded commands run with the caller's GIT_* identity, not the daemon's."""
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "daemon-owner")
+    monkeypatch.setenv("GIT_PYTHON_TRACE", "0")
+    env = {**forwarded_env(), "GIT_COMMITTER_NAME": "caller", "GIT_AUTHOR_NAME": "caller"}
+    assert "GIT_PYTHON_TRACE" not in forwarded_env()
+
+    response = send(daemon.path, {"argv": ["add", "Identity note"], "env": env}, timeout=10)
+    assert response["exit_code"] == 0, response
+    notes_commit = Repo(daemon.repo.working_tree_dir).commit("refs/notes/agent/decision")
+    assert notes_commit.committer.name == "caller"
+    assert os.environ["GIT_COMMITTER_NAME"] == "daemon-owner"
+
+def test_long_socket_path_uses_runtime_dir(tmp_path, monkeypatch):
+    """Sockets that do not fit in the git dir go to the per-user runtime dir."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    path = socket_path("/" + "deep/" * 30 + ".git")
+    assert os.path.dirname(path) == str(tmp_path)
@@ -0,0 +1,70 @@
+import pytest
+from git import Repo
+from typer.testing import CliRunner
+from agent_notes.main import app
+from agent_notes.fleet import expand_paths
+
+runner = CliRunner()
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch):
+    """Create two repositories with notes added in a known order."""
+    paths = []
+    for name, message in [("alpha", "Alpha decision"), ("beta", "Beta decision")]:
+        repo_path = tmp_path / name
+        repo_path.mkdir()
+        repo = Repo.init(repo_path)
+        (repo_path / "dummy.txt").write_text(name)
+        repo.index.add(["dummy.txt"])
+        repo.index.commit("Initial commit")
+        monkeypatch.chdir(repo_path)
+        runner.invoke(app, ["add", message, "--agent-id", f"{name}-agent"])
+        paths.append(str(repo_path))
+    monkeypatch.chdir(tmp_path)
+    return paths
+
+def test_expand_paths(fleet, tmp_path):
+    """Globs are expanded and duplicates dropped."""
+    assert expand_paths([str(tmp_path / "*"), fleet[0]]) == fleet
+
+def test_fleet_log_merges_newest_first(fleet):
+    """Notes from every repository are merged newest first."""
+    result = runner.invoke(app, ["fleet", "log", *fleet, "--plain"])
+    assert result.exit_code == 0
+    assert result.output.index("Beta decision") < result.output.index("Alpha decision")
+
+def test_fleet_isolates_errors(fleet, tmp_path):
+    """A broken repository is reported without hiding the others."""
+    missing = str(tmp_path / "missing")
+    result = runner.invoke(app, ["fleet", "log", *fleet, missing, "--plain", "-j", "2"])
+    assert result.exit_code == 0
+    assert "Alpha decision" in result.output
+    assert "Beta decision" in result.output
+    assert f"ERROR {missing}" in result.output
+
+    result = runner.invoke(app, ["fleet", "log", missing])
+    assert result.exit_code == 1
+
+def test_fleet_search(fleet):
+    """Search only returns matching notes."""
+    result = runner.invoke(app, ["fleet", "search", "beta", *fleet, "--plain"])
+    assert result.exit_code == 0
+    assert "Beta decision" in result.output
+    assert "Alpha decision" not in result.output
+
+def test_fleet_search_ignores_json_keys(fleet, monkeypatch):
+    """Queries match note values, not the JSON keys every note carries; raw text only for non-JSON notes."""
+    monkeypatch.chdir(fleet[0])
+    runner.invoke(app, ["add", "Tracked work", "--type", "trace", "--data", '{"ticket": "OPS-42"}'])
+    Repo(fleet[1]).git.execute(["git", "notes", "--ref", "refs/notes/agent/trace", "add", "-m", "raw message text", "HEAD"])
+
+    def found(query):
+        result = runner.invoke(app, ["fleet", "search", query, *fleet, "--plain"])
+        assert result.exit_code == 0
+        return [line for line in result.output.splitlines() if not line.startswith("---")]
+
+    for query in ("agent_id", "timestamp", "version", "ticket"):
+        assert found(query) == [], query
+    assert len(found("message")) == 1 and "raw message text" in found("message")[0]
+    assert "Tracked work" in found("ops-42")[0]
+    assert "Alpha decision" in found("alpha-agent")[0]
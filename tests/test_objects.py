@@ -0,0 +1,183 @@
+import hashlib
+import struct
+import zlib
+import pytest
+from git import Git, Repo
+from typer.testing import CliRunner
+from agent_notes.main import app
+from agent_notes.objects import OBJ_BLOB, OBJ_OFS_DELTA, ObjectReader, UnsupportedRepoError
+
+runner = CliRunner()
+
+def make_commits(repo_path, count):
+    repo = Repo(repo_path)
+    for i in range(count):
+        (repo_path / f"file{i}.txt").write_text(f"content {i}\n" * 50)
+        repo.index.add([f"file{i}.txt"])
+        repo.index.commit(f"Commit {i}")
+        runner.invoke(app, ["add", f"Note for commit {i}", "--type", "memory"])
+    return repo
+
+def assert_matches_git(repo):
+    reader = ObjectReader(repo.git_dir, repo.common_dir)
+    commits = list(repo.iter_commits("HEAD"))
+    for commit in commits[:-1]:
+        expected = repo.git.execute(["git", "notes", "--ref", "refs/notes/agent/memory", "show", commit.hexsha])
+        assert reader.read_note("refs/notes/agent/memory", commit.hexsha) == expected
+    # The fixture's initial commit has no note.
+    assert reader.read_note("refs/notes/agent/memory", commits[-1].hexsha) is None
+    assert reader.read_note("refs/notes/agent/decision", "HEAD") is None
+
+def test_read_loose_notes(temp_repo):
+    """Notes written as loose objects are read without git."""
+    repo = make_commits(temp_repo, 3)
+    assert_matches_git(repo)
+
+def test_read_packed_notes(temp_repo):
+    """Notes in packfiles, including deltified objects and packed refs, are read without git."""
+    repo = make_commits(temp_repo, 5)
+    repo.git.execute(["git", "gc", "--aggressive", "--quiet"])
+    assert not (temp_repo / ".git" / "refs" / "notes" / "agent" / "memory").exists()
+    assert_matches_git(repo)
+
+def test_unsupported_revision(temp_repo):
+    """Revisions the reader cannot resolve are reported so callers can fall back to git."""
+    repo = make_commits(temp_repo, 1)
+    reader = ObjectReader(repo.git_dir, repo.common_dir)
+    with pytest.raises(UnsupportedRepoError):
+        reader.read_note("refs/notes/agent/memory", "HEAD~0")
+
+def test_packed_refs_reparsed_only_when_changed(temp_repo):
+    """Packed refs are cached until git rewrites the packed-refs file."""
+    repo = make_commits(temp_repo, 1)
+    repo.git.execute(["git", "pack-refs", "--all"])
+    reader = ObjectReader(repo.git_dir, repo.common_dir)
+    packed = reader._packed_refs()
+    assert reader._packed_refs() is packed
+    assert reader.resolve_ref("refs/heads/other") is None
+
+    repo.git.execute(["git", "branch", "other"])
+    repo.git.execute(["git", "pack-refs", "--all"])
+    assert reader.resolve_ref("refs/heads/other") == repo.head.commit.hexsha
+
+def test_reload_packs_after_repack(temp_repo):
+    """New packs are picked up without remapping existing ones; removed packs are closed."""
+    repo = make_commits(temp_repo, 2)
+    repo.git.execute(["git", "repack", "-d", "--quiet"])
+    reader = ObjectReader(repo.git_dir, repo.common_dir)
+    assert_matches_git(repo)
+    reader.read_note("refs/notes/agent/memory", "HEAD")
+    first = reader._packs[0]
+
+    make_commits(temp_repo, 1)
+    repo.git.execute(["git", "repack", "-d", "--quiet"])
+    assert "Note for commit 0" in reader.read_note("refs/notes/agent/memory", "HEAD")
+    assert len(reader._packs) == 2
+    assert first in reader._packs
+
+    repo.git.execute(["git", "repack", "-a", "-d", "--quiet"])
+    reader._load_packs()
+    assert len(reader._packs) == 1
+    assert first not in reader._packs
+    assert first.pack.closed
+
+def test_note_lookups_cached_per_notes_commit(temp_repo, monkeypatch):
+    """Repeated lookups are served from the cache until the notes ref moves."""
+    repo = make_commits(temp_repo, 2)
+    reader = ObjectReader(repo.git_dir, repo.common_dir)
+    first = reader.read_note("refs/notes/agent/memory", "HEAD")
+    initial = repo.commit("HEAD~2").hexsha
+    assert reader.read_note("refs/notes/agent/memory", initial) is None
+    tree = reader.commit_tree(repo.commit("refs/notes/agent/memory").hexsha)
+    assert reader.read_tree(tree) is reader.read_tree(tree)
+
+    def no_reads(*args):
+        raise AssertionError("object read for a cached note")
+    monkeypatch.setattr(reader, "read_object", no_reads)
+    assert reader.read_note("refs/notes/agent/memory", "HEAD") == first
+    assert reader.read_note("refs/notes/agent/memory", initial) is None
+    monkeypatch.undo()
+
+    runner.invoke(app, ["add", "Replacement", "--type", "memory", "--force"])
+    assert "Replacement" in reader.read_note("refs/notes/agent/memory", "HEAD")
+
+def test_cli_native_read(temp_repo, monkeypatch):
+    """The CLI reads notes natively, without falling back to `git notes show`."""
+    make_commits(temp_repo, 2)
+    monkeypatch.setenv("AGENT_NOTES_NATIVE_READ", "1")
+
+    execute = Git.execute
+    def no_notes_show(self, command, *args, **kwargs):
+        assert command[1:2] != ["notes"], f"fell back to git: {command}"
+        return execute(self, command, *args, **kwargs)
+    monkeypatch.setattr(Git, "execute", no_notes_show)
+
+    result = runner.invoke(app, ["log", "--limit", "2", "--plain"])
+    assert result.exit_code == 0
+    assert "Note for commit 0" in result.output
+    assert "Note for commit 1" in result.output
+
+def _pack_header(obj_type, size):
+    byte = (obj_type << 4) | (size & 0x0F)
+    size >>= 4
+    out = bytearray()
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7F
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+def _ofs(rel):
+    out = [rel & 0x7F]
+    rel >>= 7
+    while rel:
+        rel -= 1
+        out.insert(0, 0x80 | (rel & 0x7F))
+        rel >>= 7
+    return bytes(out)
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+def test_long_delta_chain(tmp_path):
+    """Delta chains deeper than the recursion limit are resolved without crashing."""
+    pack_dir = tmp_path / ".git" / "objects" / "pack"
+    pack_dir.mkdir(parents=True)
+
+    depth = 2000
+    data = b"x" * 100
+    body = bytearray(b"PACK" + struct.pack(">II", 2, depth + 1))
+    entries = []
+    prev = None
+    for i in range(depth + 1):
+        offset = len(body)
+        if prev is None:
+            body += _pack_header(OBJ_BLOB, len(data)) + zlib.compress(data)
+        else:
+            # Copy the whole base (size in two bytes), then insert one byte.
+            delta = _varint(len(data)) + _varint(len(data) + 1)
+            delta += bytes([0x80 | 0x10 | 0x20, len(data) & 0xFF, len(data) >> 8, 1, ord("a")])
+            data += b"a"
+            body += _pack_header(OBJ_OFS_DELTA, len(delta)) + _ofs(offset - prev) + zlib.compress(delta)
+        entries.append((hashlib.sha1(b"blob %d\0" % len(data) + data).digest(), offset))
+        prev = offset
+
+    entries.sort()
+    fanout = [sum(1 for sha, _ in entries if sha[0] <= b) for b in range(256)]
+    idx = b"\377tOc" + struct.pack(">I", 2) + struct.pack(">256I", *fanout)
+    idx += b"".join(sha for sha, _ in entries)
+    idx += b"\0" * 4 * len(entries)
+    idx += b"".join(struct.pack(">I", off) for _, off in entries)
+    (pack_dir / "pack-test.pack").write_bytes(bytes(body))
+    (pack_dir / "pack-test.idx").write_bytes(idx)
+
+    reader = ObjectReader(str(tmp_path / ".git"))
+    last = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+    assert reader.read_object(last) == (OBJ_BLOB, data)